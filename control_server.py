@@ -0,0 +1,115 @@
+# control_server.py
+#
+# Flask backend for the 2-DOF control UI in control_page.py.
+#
+# Don't serve this with the Werkzeug dev server in production -- it is
+# single-threaded, so the /api/angles poll the page does every 800 ms
+# stalls behind any in-flight move.  Run it under gunicorn instead:
+#
+#   gunicorn -w 1 -k gthread --threads 4 -b 0.0.0.0:5000 control_server:app
+#
+# One worker, because exactly one process may own the motor hardware;
+# a few threads so angle reads proceed while a move command executes
+# (the Steppers serialize actual motion themselves via their queues).
+
+import json
+import multiprocessing
+import RPi.GPIO as GPIO
+from flask import Flask, Response, request, jsonify, send_from_directory
+from werkzeug.exceptions import NotFound
+
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+# Shift register pins (BCM)
+DATA_PIN  = 16
+LATCH_PIN = 20
+CLOCK_PIN = 21
+
+app = Flask(__name__)
+
+# Hardware setup at module load: with -w 1 and preload this runs exactly
+# once, before any request is served.
+GPIO.setwarnings(False)
+GPIO.setmode(GPIO.BCM)
+
+s = Shifter(data=DATA_PIN, latch=LATCH_PIN, clock=CLOCK_PIN)
+
+lock1 = multiprocessing.Lock()
+lock2 = multiprocessing.Lock()
+
+m_az = Stepper(s, lock1, index=0)
+m_el = Stepper(s, lock2, index=1)
+
+m_az.zero()
+m_el.zero()
+
+motors = {"az": m_az, "el": m_el}
+
+# The command payloads are tiny fixed-schema dicts, so skip Flask's
+# get_json content-type sniffing and jsonify's per-request dict dump:
+OK_BODY = b'{"ok": true}'
+
+
+def _json_body():
+    return json.loads(request.get_data() or b"{}")
+
+
+def _ok():
+    return Response(OK_BODY, mimetype='application/json')
+
+
+@app.route('/')
+def index():
+    # control_page.py is the HTML page for this UI.  send_from_directory
+    # supports conditional GETs, and the cache header lets the browser
+    # reuse the page instead of re-downloading it on every refresh --
+    # everything live on it comes from the /api/angles poll anyway.
+    resp = send_from_directory('.', 'control_page.py', mimetype='text/html')
+    resp.headers['Cache-Control'] = 'public, max-age=3600'
+    return resp
+
+
+@app.route('/static/field_diagram')
+def field_diagram():
+    try:
+        resp = send_from_directory('.', 'field_diagram.png', mimetype='image/png')
+    except NotFound:
+        return jsonify({"ok": False, "error": "no field diagram"}), 404
+    resp.headers['Cache-Control'] = 'public, max-age=3600'
+    return resp
+
+
+@app.route('/api/move', methods=['POST'])
+def api_move():
+    data = _json_body()
+    axis = data.get("axis", "")
+    delta = float(data.get("delta", 0))
+    if axis not in motors:
+        return jsonify({"ok": False, "error": "unknown axis"})
+    motors[axis].rotate(delta)
+    return _ok()
+
+
+@app.route('/api/set_zero', methods=['POST'])
+def api_set_zero():
+    data = _json_body()
+    axis = data.get("axis", "")
+    if axis not in motors:
+        return jsonify({"ok": False, "error": "unknown axis"})
+    motors[axis].zero()
+    return _ok()
+
+
+@app.route('/api/angles')
+def api_angles():
+    with m_az.angle.get_lock():
+        az = m_az.angle.value
+    with m_el.angle.get_lock():
+        el = m_el.angle.value
+    return jsonify({"ok": True, "az": az, "el": el})
+
+
+if __name__ == "__main__":
+    # dev/debug fallback only -- use the gunicorn command above otherwise
+    app.run(host='0.0.0.0', port=5000, debug=False)
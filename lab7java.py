@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import RPi.GPIO as GPIO
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import selectors
+import socket
 import urllib.parse
 import json
 
@@ -21,38 +22,57 @@ for pwm in pwms:
 led_brightness = [0, 0, 0]
 
 
-class LEDHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        """Serve the main HTML+JavaScript page"""
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(self.html_page().encode("utf-8"))
+def handle_get():
+    """Build the response for the main HTML+JavaScript page"""
+    body = html_page().encode("utf-8")
+    header = (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: text/html\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return header.encode("utf-8") + body
 
-    def do_POST(self):
-        """Handle AJAX POST updates"""
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length).decode("utf-8")
-        data = urllib.parse.parse_qs(post_data)
 
-        # Extract LED and brightness
-        led_index = int(data.get("led", [0])[0])
-        brightness = int(data.get("brightness", [0])[0])
+# constant empty reply for POSTs; the UI echo moved to GET /state
+NO_CONTENT = b"HTTP/1.1 204 No Content\r\nConnection: close\r\n\r\n"
 
-        # Update state and PWM
+# pre-encoded /state response, rebuilt only when a brightness changes
+state_response = None
+
+
+def build_state_response():
+    global state_response
+    body = json.dumps({"led_brightness": led_brightness}).encode("utf-8")
+    header = (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    state_response = header.encode("utf-8") + body
+
+
+def handle_post(body_text):
+    """Handle AJAX POST updates; reply is an empty 204"""
+    data = urllib.parse.parse_qs(body_text)
+
+    # Extract LED and brightness
+    led_index = int(data.get("led", [0])[0])
+    brightness = int(data.get("brightness", [0])[0])
+
+    # Update state and PWM (skip the hardware call when nothing changed)
+    if led_brightness[led_index] != brightness:
         led_brightness[led_index] = brightness
         pwms[led_index].ChangeDutyCycle(brightness)
+        build_state_response()
 
-        # Respond with JSON (no reload)
-        self.send_response(200)
-        self.send_header("Content-type", "application/json")
-        self.end_headers()
-        response = {"led_brightness": led_brightness}
-        self.wfile.write(json.dumps(response).encode("utf-8"))
+    return NO_CONTENT
 
-    def html_page(self):
-        """Return the full HTML + JavaScript UI"""
-        return f"""
+
+def html_page():
+    """Return the full HTML + JavaScript UI"""
+    return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -78,7 +98,7 @@ function updateLED(led, value) {{
   // Display new percentage next to slider
   document.getElementById("val" + led).innerText = value + "%";
 
-  // Send POST request to server
+  // Send POST request to server (reply is an empty 204, no echo)
   fetch("/", {{
     method: "POST",
     headers: {{
@@ -86,16 +106,25 @@ function updateLED(led, value) {{
     }},
     body: "led=" + led + "&brightness=" + value
   }})
-  .then(response => response.json())
-  .then(data => {{
-    // Update labels to reflect new brightness values
-    for (let i = 0; i < 3; i++) {{
-      document.getElementById("val" + i).innerText = data.led_brightness[i] + "%";
-      document.getElementById("slider" + i).value = data.led_brightness[i];
-    }}
-  }})
   .catch(err => console.error("Error:", err));
 }}
+
+// Poll /state to pick up changes made from other browsers; skip whichever
+// slider is being dragged so it doesn't snap back under the pointer.
+function refreshState() {{
+  fetch("/state")
+    .then(response => response.json())
+    .then(data => {{
+      for (let i = 0; i < 3; i++) {{
+        const slider = document.getElementById("slider" + i);
+        if (slider === document.activeElement) continue;
+        document.getElementById("val" + i).innerText = data.led_brightness[i] + "%";
+        slider.value = data.led_brightness[i];
+      }}
+    }})
+    .catch(err => console.error("Error:", err));
+}}
+setInterval(refreshState, 500);
 </script>
 </head>
 
@@ -128,11 +157,104 @@ function updateLED(led, value) {{
 """
 
 
+# Event-loop server: one selector watches the listening socket plus every
+# client, so a burst of slider POSTs doesn't queue behind a blocking handler
+# the way it did with HTTPServer.
+
+def request_complete(buf):
+    """True once buf holds the full request (headers + Content-Length body)"""
+    end = buf.find(b"\r\n\r\n")
+    if end < 0:
+        return False
+    length = 0
+    for line in buf[:end].decode("utf-8", errors="ignore").split("\r\n"):
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1].strip())
+            break
+    return len(buf) >= end + 4 + length
+
+
+def build_response(buf):
+    """Dispatch a complete request to the GET/POST handlers"""
+    text = buf.decode("utf-8", errors="ignore")
+    if text.startswith("POST"):
+        body_text = text.split("\r\n\r\n", 1)[1]
+        return handle_post(body_text)
+    parts = text.split("\r\n", 1)[0].split()
+    path = parts[1] if len(parts) >= 2 else "/"
+    if path == "/state":
+        if state_response is None:
+            build_state_response()
+        return state_response
+    return handle_get()
+
+
+def run_server(host='', port=8080):
+    sel = selectors.DefaultSelector()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(16)
+    listener.setblocking(False)
+    sel.register(listener, selectors.EVENT_READ, None)
+
+    while True:
+        for key, events in sel.select():
+            if key.data is None:
+                # new connection
+                conn, addr = listener.accept()
+                conn.setblocking(False)
+                sel.register(conn, selectors.EVENT_READ,
+                             {"inbuf": b"", "outbuf": b""})
+                continue
+
+            conn, state = key.fileobj, key.data
+
+            if events & selectors.EVENT_READ:
+                try:
+                    chunk = conn.recv(8192)
+                except (BlockingIOError, ConnectionResetError):
+                    chunk = None
+                if not chunk:
+                    sel.unregister(conn)
+                    conn.close()
+                    continue
+                state["inbuf"] += chunk
+                try:
+                    if request_complete(state["inbuf"]):
+                        state["outbuf"] = build_response(state["inbuf"])
+                        state["inbuf"] = b""
+                        sel.modify(conn, selectors.EVENT_WRITE, state)
+                except Exception as e:
+                    # a malformed request (junk Content-Length, bad form
+                    # values) costs that client its connection, not the
+                    # whole server -- HTTPServer isolated handler errors
+                    # the same way
+                    print(f"dropping connection after bad request: {e}")
+                    sel.unregister(conn)
+                    conn.close()
+
+            if events & selectors.EVENT_WRITE and state["outbuf"]:
+                try:
+                    sent = conn.send(state["outbuf"])
+                except (BlockingIOError, BrokenPipeError, ConnectionResetError):
+                    sent = -1
+                if sent < 0:
+                    sel.unregister(conn)
+                    conn.close()
+                    continue
+                state["outbuf"] = state["outbuf"][sent:]
+                if not state["outbuf"]:
+                    # response fully sent, we close after each request
+                    sel.unregister(conn)
+                    conn.close()
+
+
 # Run the server
 try:
     print("Starting LED control server on http://0.0.0.0:8080 ...")
-    with HTTPServer(('', 8080), LEDHandler) as server:
-        server.serve_forever()
+    run_server()
 except KeyboardInterrupt:
     pass
 finally:
@@ -1,5 +1,6 @@
 import socket
 import time
+import threading
 import multiprocessing
 import json
 import urllib.request
@@ -44,7 +45,28 @@ globes = []
 
 # json function defs
 
-def load_positions():
+POSITIONS_TTL = 1.0     # seconds to keep a fetched copy before hitting the server again
+
+_positions_cache = {"t": 0.0, "data": None}   # last fetch time + data
+_positions_inflight = None                    # event set when an in-progress fetch finishes
+_positions_lock = threading.Lock()
+
+coords_response = None      # full /coords reply (header + json bytes), rebuilt on fetch
+
+
+def _build_coords_response(data):
+    # serialize once per fetch instead of on every /coords hit
+    global coords_response
+    body = json.dumps(data, indent=2).encode()
+    coords_response = (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+
+def _fetch_positions():
     # load json from local file or url
     if USE_LOCAL_JSON:
         if not os.path.exists(LOCAL_JSON_FILE):
@@ -60,6 +82,43 @@ def load_positions():
             return json.loads(data)
 
 
+def load_positions():
+    # cached + coalesced version of the fetch: if several requests want the
+    # positions at once, only one of them actually goes to the server and the
+    # rest wait for (and share) its result
+    global _positions_inflight
+
+    if time.time() - _positions_cache["t"] < POSITIONS_TTL:
+        return _positions_cache["data"]
+
+    with _positions_lock:
+        # someone may have refreshed while we waited on the lock
+        if time.time() - _positions_cache["t"] < POSITIONS_TTL:
+            return _positions_cache["data"]
+        if _positions_inflight is not None:
+            waiter = _positions_inflight   # a fetch is already running, wait on it
+        else:
+            waiter = None
+            _positions_inflight = threading.Event()
+
+    if waiter is not None:
+        waiter.wait()
+        return _positions_cache["data"]
+
+    # we are the one doing the actual fetch
+    try:
+        data = _fetch_positions()
+        _positions_cache["data"] = data
+        _positions_cache["t"] = time.time()
+        _build_coords_response(data)
+    finally:
+        with _positions_lock:
+            _positions_inflight.set()
+            _positions_inflight = None
+
+    return _positions_cache["data"]
+
+
 def process_positions():
     turrets = positions["turrets"]          # defining keys for the dict for turrets and globes
     globes = positions["globes"]
@@ -110,7 +169,32 @@ def setup_motors():
 # web server set up stuff
 
 def recv_request(conn):
-    return conn.recv(8192).decode("utf-8", errors="ignore")
+    # read a full request: loop until the header block is complete, then
+    # keep reading until we have Content-Length body bytes (a POST can be
+    # split across TCP packets, one recv() is not enough)
+    buf = b""
+    while b"\r\n\r\n" not in buf:
+        chunk = conn.recv(8192)
+        if not chunk:
+            return buf.decode("utf-8", errors="ignore")
+        buf += chunk
+
+    header_end = buf.find(b"\r\n\r\n") + 4
+    headers = buf[:header_end].decode("utf-8", errors="ignore")
+
+    length = 0
+    for line in headers.split("\r\n"):
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1].strip())
+            break
+
+    while len(buf) - header_end < length:
+        chunk = conn.recv(8192)
+        if not chunk:
+            break
+        buf += chunk
+
+    return buf.decode("utf-8", errors="ignore")
 
 def parse_request_line(req_text):   # parse header request
     first = req_text.split("\r\n", 1)[0]
@@ -143,6 +227,20 @@ def send_json(conn, obj):   # # send header as json
     ).encode() + obj.encode())
 
 
+def _canned_json(body):
+    # build a complete response (header + body) once, as bytes
+    return (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+# the status replies never change, so send them as prebuilt bytes
+OK_JSON     = _canned_json(b'{"status":"ok"}')
+ZEROED_JSON = _canned_json(b'{"status":"zeroed"}')
+
+
 # html stuff
 
 def page_html():
@@ -169,21 +267,32 @@ def page_html():
   <button onclick="zeroAll()">Zero Motors</button>
 
 <script>
-async function sendAngle(axis, angle) {{
-  await fetch("/set", {{
-    method: "POST",
-    headers: {{ "Content-Type": "application/x-www-form-urlencoded" }},
-    body: "axis="+axis+"&angle="+angle
+// latest slider values; one throttled sender posts both axes together
+let latest = {{ az: 0, el: 0 }};
+let sendQueued = false;
+
+function queueSend() {{
+  if (sendQueued) return;       // a send is already scheduled for this frame
+  sendQueued = true;
+  requestAnimationFrame(async () => {{
+    sendQueued = false;
+    await fetch("/setall", {{
+      method: "POST",
+      headers: {{ "Content-Type": "application/x-www-form-urlencoded" }},
+      body: "az="+latest.az+"&el="+latest.el
+    }});
   }});
 }}
 
 document.getElementById("az").oninput = e => {{
   az_val.textContent = e.target.value;
-  sendAngle("az", e.target.value);
+  latest.az = e.target.value;
+  queueSend();
 }};
 document.getElementById("el").oninput = e => {{
   el_val.textContent = e.target.value;
-  sendAngle("el", e.target.value);
+  latest.el = e.target.value;
+  queueSend();
 }};
 
 async function zeroAll() {{
@@ -207,6 +316,14 @@ def handle_post_set(req_text):      # read response from web interface, makes su
     if axis == "az":  m_az.goAngle(angle)
     if axis == "el":  m_el.goAngle(angle)
 
+def handle_post_set_all(req_text):  # batched version: both axes in one POST
+    data = parse_post_body(req_text)
+    az = float(data.get("az", "0"))
+    el = float(data.get("el", "0"))
+
+    m_az.goAngle(az)
+    m_el.goAngle(el)
+
 def handle_post_zero():         # zeros motors
     m_az.zero()
     m_el.zero()
@@ -229,17 +346,23 @@ def run_server():
 
         if method == "GET":        # get position data
             if path == "/coords":
-                send_json(conn, json.dumps(positions, indent=2))
+                if coords_response is not None:
+                    conn.sendall(coords_response)   # pre-encoded at fetch time
+                else:
+                    send_json(conn, json.dumps(positions, indent=2))
             else:
                 send_html(conn, page_html())
 
         elif method == "POST":     # get zeroed status
             if path == "/set":
                 handle_post_set(req)
-                send_json(conn, '{"status":"ok"}')
+                conn.sendall(OK_JSON)
+            elif path == "/setall":
+                handle_post_set_all(req)
+                conn.sendall(OK_JSON)
             elif path == "/zero":
                 handle_post_zero()
-                send_json(conn, '{"status":"zeroed"}')
+                conn.sendall(ZEROED_JSON)
 
         conn.close()
 
@@ -14,35 +14,117 @@ class Shifter():
         GPIO.setup(self.dataPin, GPIO.OUT)
         GPIO.setup(self.latchPin, GPIO.OUT)
         GPIO.setup(self.clockPin, GPIO.OUT)
+        # only 256 possible bytes, so precompile the pin/value sequence for
+        # each of them once -- shiftByte then just looks its byte up
+        self._byte_lut = [self._compile_byte(b) for b in range(256)]
+
+    def _compile_byte(self, databyte):
+        # same sequence shiftWord(databyte, 8) would build, flattened once
+        pins = []
+        vals = []
+        trio = [self.dataPin, self.clockPin, self.clockPin]
+        pins += trio               # the single pad bit for an 8-bit word
+        vals += [0, 1, 0]
+        for i in range(8):
+            pins += trio
+            vals += [1 if databyte & (1<<i) else 0, 1, 0]
+        return pins, vals
 
     def ping(self, p):  # ping the clock or latch pin
         GPIO.output(p,1)
-        sleep(0)
         GPIO.output(p,0)
 
     # Shift all bits in an arbitrary-length word, allowing
     # multiple 8-bit shift registers to be chained (with overflow
     # of SR_n tied to input of SR_n+1):
     def shiftWord(self, dataword, num_bits):
+        # build the whole data/clock sequence first, then submit it as one
+        # list-form GPIO.output call so the Python->C crossing happens once
+        # per word instead of 3x per bit
+        pins = []
+        vals = []
+        trio = [self.dataPin, self.clockPin, self.clockPin]
         for i in range((num_bits+1) % 8):  # Load bits short of a byte with 0
-            # self.dataPin.value(0)  # MicroPython for ESP32
-            GPIO.output(self.dataPin, 0) 
-            self.ping(self.clockPin)
+            pins += trio
+            vals += [0, 1, 0]
         for i in range(num_bits):          # Send the word
-            # self.dataPin.value(dataword & (1<<i))  # MicroPython for ESP32
-            GPIO.output(self.dataPin, dataword & (1<<i))
-            self.ping(self.clockPin)
+            pins += trio
+            vals += [1 if dataword & (1<<i) else 0, 1, 0]
+        GPIO.output(pins, vals)
         self.ping(self.latchPin)
 
     # Shift all bits in a single byte:
     def shiftByte(self, databyte):
-        self.shiftWord(databyte, 8)
+        pins, vals = self._byte_lut[databyte & 0xFF]
+        GPIO.output(pins, vals)
+        self.ping(self.latchPin)
+
+
+class SpiShifter():
+    # Same interface as Shifter, but clocks the bits out with the Pi's
+    # hardware SPI peripheral instead of bit-banging data/clock from Python.
+    # Wire the register's data to MOSI, clock to SCLK, and latch to CE0
+    # (or pass latch=<pin> to drive the latch from a GPIO instead).
+
+    # The Pi's SPI block only transmits MSB-first, while Shifter clocks
+    # LSB-first -- so every byte is mirrored through this LUT before it
+    # goes out (same precompute-all-256 idea as Shifter._byte_lut), making
+    # both shifters land identical bit patterns on the register outputs.
+    _rev_byte = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+    def __init__(self, bus=0, device=0, speed_hz=4000000, latch=None):
+        import spidev   # only needed when SPI is actually used
+        self.spi = spidev.SpiDev()
+        self.spi.open(bus, device)
+        self.spi.max_speed_hz = speed_hz
+        self.spi.mode = 0
+        self.latchPin = latch
+        if self.latchPin is not None:
+            GPIO.setup(self.latchPin, GPIO.OUT)
+
+    def ping(self, p):  # ping the latch pin
+        GPIO.output(p,1)
+        sleep(0)
+        GPIO.output(p,0)
+
+    # Send a word in Shifter's clock order: low byte first (the earliest
+    # bits clocked travel furthest down a register chain), each byte
+    # mirrored for the MSB-first hardware:
+    def shiftWord(self, dataword, num_bits):
+        num_bytes = (num_bits + 7) // 8
+        rev = SpiShifter._rev_byte
+        data = [rev[(dataword >> 8*i) & 0xFF] for i in range(num_bytes)]
+        self.spi.xfer2(data)
+        if self.latchPin is not None:
+            self.ping(self.latchPin)
+
+    def shiftByte(self, databyte):
+        # single-byte fast path: one SPI transfer + latch, no list building
+        self.spi.xfer2([SpiShifter._rev_byte[databyte & 0xFF]])
+        if self.latchPin is not None:
+            GPIO.output(self.latchPin, 1)
+            GPIO.output(self.latchPin, 0)
+
+    # Stream a precomputed byte sequence (e.g. every step pattern of a
+    # whole rotation) in one submission.  writebytes2 chunks the buffer
+    # to the SPI driver's transfer limit internally, so thousands of
+    # bytes cross the kernel boundary in a handful of ioctls instead of
+    # one per byte.  Note there is no per-byte timing control from
+    # Python inside the stream: the bytes go out at the SPI clock rate,
+    # so this needs the latch strobed by hardware (e.g. latch on CE with
+    # one byte per frame).  For software-paced stepping keep shiftByte.
+    def shiftStream(self, data):
+        # one translate() mirrors the whole buffer through the LUT in C
+        self.spi.writebytes2(bytes(data).translate(SpiShifter._rev_byte))
+        if self.latchPin is not None:
+            self.ping(self.latchPin)
 
 
 # Example:
 #
 # from time import sleep
 # s = Shifter(data=16,clock=20,latch=21)   # convenient Pi pins
+# s = SpiShifter(latch=20)                 # or use hardware SPI instead
 # for i in range(256):
 #     s.shiftByte(i)
 #     sleep(0.1)
@@ -1,174 +1,262 @@
-# stepper_class_shiftregister_multiprocessing.py
-#
-# Updated Stepper class for Lab 8
-# - Uses shiftWord(...) to write all shift-register bits
-# - Uses multiprocessing.Value for shared angle
-# - Prints debugging info at each step and at rotate start
-# - Masks each motor's 4 bits to avoid overwriting other motors
-
-import time
-import multiprocessing
-from shifter import Shifter   # custom Shifter class (must implement shiftWord)
-
-class Stepper:
-    """
-    Stepper class supporting multiple steppers sharing chained shift registers.
-    Each motor uses 4 bits. Class attribute shifter_outputs holds the full
-    output word for all motors; each motor only updates its own 4-bit section.
-    """
-
-    # Class attributes
-    num_steppers = 0
-    shifter_outputs = 0
-    seq = [0b0001, 0b0011, 0b0010, 0b0110,
-           0b0100, 0b1100, 0b1000, 0b1001]  # 8-step CCW sequence
-    delay = 1200            # microseconds between steps
-    steps_per_degree = 4096.0 / 360.0
-
-    def __init__(self, shifter, lock):
-        self.s = shifter
-        # angle is shared across processes
-        self.angle = multiprocessing.Value('d', 0.0)
-        self.step_state = 0
-        # assign block of 4 bits to this motor (0-based)
-        self.shifter_bit_start = 4 * Stepper.num_steppers
-        # store a friendly motor id for debugging (1-based)
-        self.motor_id = (self.shifter_bit_start // 4) + 1
-        self.lock = lock
-
-        Stepper.num_steppers += 1
-
-    # simple sign function
-    def __sgn(self, x):
-        if x == 0:
-            return 0
-        return int(abs(x) / x)
-
-    def __step(self, dir):
-        """
-        Perform one step (dir is +1 or -1).
-        Update only this motor's 4 bits in the shared shifter_outputs,
-        then write the entire output word to the chained shift registers.
-        """
-        # advance step state
-        self.step_state = (self.step_state + dir) % len(Stepper.seq)
-
-        # mask for this motor's 4 bits
-        mask = 0b1111 << self.shifter_bit_start
-
-        # clear only this motor's bits
-        Stepper.shifter_outputs &= ~mask
-
-        # set this motor's bits according to current step state
-        Stepper.shifter_outputs |= (Stepper.seq[self.step_state] << self.shifter_bit_start)
-
-        # write the full word to the shift registers:
-        # number of bits = 4 bits per motor * number of motors instantiated
-        total_bits = max(8, Stepper.num_steppers * 4)  # at least 8 for single register
-        # use shiftWord to send arbitrary-length word to chained shift registers
-        self.s.shiftWord(Stepper.shifter_outputs, total_bits)
-
-        # update shared angle (in degrees)
-        self.angle.value += dir / Stepper.steps_per_degree
-        self.angle.value %= 360.0
-
-    def __rotate(self, delta):
-        """
-        Rotate by delta degrees (signed). Runs in a separate process.
-        Debug prints included: start of rotation and after each step.
-        """
-        # compute absolute target angle for useful debug messages
-        start_angle = self.angle.value
-        target_angle = (start_angle + delta) % 360.0
-
-        # announce rotation
-        print(f"[Motor {self.motor_id}] START rotate: delta={delta:.2f}°, start={start_angle:.2f}°, "
-              f"target={target_angle:.2f}°", flush=True)
-
-        # Acquire lock (if using shared lock behavior). If you want true parallel
-        # motion, give each motor its own lock in main.
-        self.lock.acquire()
-        try:
-            numSteps = int(abs(delta) * Stepper.steps_per_degree)
-            direction = self.__sgn(delta)
-            for step_num in range(1, numSteps + 1):
-                self.__step(direction)
-                # debug: print angle after each step
-                print(f"[Motor {self.motor_id}] step {step_num}/{numSteps} -> angle={self.angle.value:.2f}°",
-                      flush=True)
-                time.sleep(Stepper.delay / 1e6)
-        finally:
-            self.lock.release()
-            # final angle report
-            print(f"[Motor {self.motor_id}] DONE rotate: final angle={self.angle.value:.2f}° (intended {target_angle:.2f}°)",
-                  flush=True)
-
-    # Public API ----------------------------------------------------------
-
-    def rotate(self, delta):
-        """Start a relative rotation by delta degrees in a new process."""
-        time.sleep(0.1)
-        p = multiprocessing.Process(target=self.__rotate, args=(delta,))
-        p.start()
-        return p
-
-    def goAngle(self, target):
-        """Move to absolute target angle using the shortest path. Runs in separate process."""
-        # calculate shortest signed delta in range (-180, 180]
-        current = self.angle.value
-        delta = target - current
-        # normalize to [-180, 180)
-        delta = (delta + 180.0) % 360.0 - 180.0
-
-        print(f"[Motor {self.motor_id}] goAngle called: target={target:.2f}°, current={current:.2f}°, delta(shortest)={delta:.2f}°",
-              flush=True)
-
-        p = multiprocessing.Process(target=self.__rotate, args=(delta,))
-        p.start()
-        return p
-
-    def zero(self):
-        """Set current angle to zero (shared)."""
-        self.angle.value = 0.0
-        print(f"[Motor {self.motor_id}] zeroed (angle set to 0.0°)", flush=True)
-
-
-# ---------------- Example usage / test harness ----------------
-if __name__ == '__main__':
-    import time
-
-    # Setup: adjust pins to match your wiring
-    s = Shifter(data=16, clock=21, latch=20)
-
-    # Use separate locks for true concurrent motion (give each motor its own lock)
-    lock1 = multiprocessing.Lock()
-    lock2 = multiprocessing.Lock()
-
-    # Instantiate motors
-    m1 = Stepper(s, lock1)
-    m2 = Stepper(s, lock2)
-
-    # Zero motors
-    m1.zero()
-    m2.zero()
-
-    time.sleep(0.5)
-    print("=== Starting lab test sequence with goAngle() ===", flush=True)
-
-    # Lab sequence (as required)
-    m1.goAngle(90)
-    m1.goAngle(-45)
-
-    m2.goAngle(-90)
-    m2.goAngle(45)
-
-    m1.goAngle(-135)
-    m1.goAngle(135)
-    m1.goAngle(0)
-
-    # Keep main alive so background processes can run
-    try:
-        while True:
-            time.sleep(0.1)
-    except KeyboardInterrupt:
-        print("\nDemo interrupted by user. Exiting.", flush=True)
+# stepper_class_shiftregister_multiprocessing.py
+#
+# Updated Stepper class for Lab 8
+# - Uses shiftWord(...) to write all shift-register bits
+# - Uses multiprocessing.Value for shared angle
+# - Prints debugging info at each step and at rotate start
+# - Masks each motor's 4 bits to avoid overwriting other motors
+#
+# The inner loop here is still Python.  If interpreter overhead per step
+# ever becomes the bottleneck, stepper_pigpio_wave.py compiles a whole
+# rotation into pigpio DMA waves so no Python runs between steps at all.
+
+import os
+import time
+import ctypes
+import multiprocessing
+from shifter import Shifter   # custom Shifter class (must implement shiftWord)
+
+
+def _make_realtime(core=None):
+    # Promote the calling process to SCHED_FIFO so a woken worker is not
+    # held back a whole scheduler tick (~4 ms under load -- several step
+    # periods), and optionally pin it to one core so it keeps its cache.
+    # Needs CAP_SYS_NICE, e.g.:
+    #   sudo setcap cap_sys_nice+ep $(readlink -f $(which python3))
+    # Without the capability we silently stay on SCHED_OTHER.
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(50))
+    except (PermissionError, OSError):
+        pass
+    if core is not None:
+        try:
+            os.sched_setaffinity(0, {core % os.cpu_count()})
+        except OSError:
+            pass
+
+class Stepper:
+    """
+    Stepper class supporting multiple steppers sharing chained shift registers.
+    Each motor uses 4 bits. Class attribute shifter_outputs holds the full
+    output word for all motors; each motor only updates its own 4-bit section.
+    """
+
+    # Class attributes
+    num_steppers = 0
+    # Each motor publishes its current 4-bit pattern (already shifted
+    # into its lane) into _patterns; a single writer process ORs the
+    # lanes together and issues exactly ONE shiftWord per tick, so two
+    # motors stepping together cost one register write and one latch
+    # pulse instead of two.  shifter_outputs keeps the last word written
+    # for anyone who wants to inspect it.
+    MAX_MOTORS = 2
+    shifter_outputs = multiprocessing.RawValue(ctypes.c_uint, 0)
+    _patterns = multiprocessing.Array('i', MAX_MOTORS)
+    _dirty = multiprocessing.Event()   # set when a lane changed since the last write
+    _writer = None
+    seq = (0b0001, 0b0011, 0b0010, 0b0110,
+           0b0100, 0b1100, 0b1000, 0b1001)  # 8-step CCW sequence (tuple)
+    delay = 1200            # microseconds between steps
+    steps_per_degree = 4096.0 / 360.0
+
+    def __init__(self, shifter, lock):
+        self.s = shifter
+        # angle is shared across processes.  RawValue: no wrapping lock --
+        # only this motor's worker writes it (single-writer invariant) and
+        # an aligned 8-byte store/load is atomic on the Pi's ARM cores, so
+        # readers just see a value at most one step stale.
+        self.angle = multiprocessing.RawValue(ctypes.c_double, 0.0)
+        self.step_state = 0
+        # assign block of 4 bits to this motor (0-based)
+        self.shifter_bit_start = 4 * Stepper.num_steppers
+        # store a friendly motor id for debugging (1-based)
+        self.motor_id = (self.shifter_bit_start // 4) + 1
+        self.lock = lock
+
+        # precompute this motor's 8 patterns already shifted into place,
+        # and its 4-bit mask -- both are fixed once bit_start is known
+        self._preshifted = tuple(v << self.shifter_bit_start for v in Stepper.seq)
+        self._mask = 0b1111 << self.shifter_bit_start
+
+        Stepper.num_steppers += 1
+
+        # One persistent worker per motor: each rotate/goAngle used to
+        # fork a fresh process (~10-50 ms on a Pi, never joined).  The
+        # worker just consumes commands from a queue; None shuts it down.
+        self._cmd_q = multiprocessing.Queue()
+        self._worker_proc = multiprocessing.Process(target=self._worker)
+        self._worker_proc.daemon = True
+        self._worker_proc.start()
+
+        if Stepper._writer is None:   # first motor starts the shared writer
+            Stepper._writer = multiprocessing.Process(target=self.__writer_loop)
+            Stepper._writer.daemon = True
+            Stepper._writer.start()
+
+    # Single hardware writer: whenever any lane changes, compose the full
+    # word from all lanes and shift it out once.
+    def __writer_loop(self):
+        _make_realtime(core=0)   # the writer paces the actual hardware
+        patterns = Stepper._patterns
+        dirty = Stepper._dirty
+        shiftWord = self.s.shiftWord
+        total_bits = max(8, 4 * Stepper.MAX_MOTORS)
+        while True:
+            dirty.wait()
+            dirty.clear()
+            word = 0
+            for p in patterns[:]:   # lanes are disjoint, just OR them
+                word |= p
+            Stepper.shifter_outputs.value = word
+            shiftWord(word, total_bits)
+
+    # simple sign function
+    def __sgn(self, x):
+        return (x > 0) - (x < 0)   # branchless sign, no float division
+
+    def __rotate(self, delta):
+        """
+        Rotate by delta degrees (signed). Runs in a separate process.
+        Debug prints included: start of rotation and after each step.
+
+        The step body is kept tiny: patterns are precomputed in __init__
+        (already shifted into this motor's 4-bit lane), and everything the
+        loop touches is bound to a local first -- a LOAD_FAST per step
+        instead of attribute lookups -- so the interpreter work between
+        sleeps is an index increment, a masked OR, and the hardware write.
+        """
+        # compute absolute target angle for useful debug messages
+        start_angle = self.angle.value
+        target_angle = (start_angle + delta) % 360.0
+
+        # announce rotation
+        print(f"[Motor {self.motor_id}] START rotate: delta={delta:.2f}°, start={start_angle:.2f}°, "
+              f"target={target_angle:.2f}°", flush=True)
+
+        # Acquire lock (if using shared lock behavior). If you want true parallel
+        # motion, give each motor its own lock in main.
+        self.lock.acquire()
+        try:
+            numSteps = int(abs(delta) * Stepper.steps_per_degree)
+            direction = self.__sgn(delta)
+
+            # hoist loop invariants to locals
+            preshifted = self._preshifted
+            delay_s = Stepper.delay / 1e6
+            deg_per_step = direction / Stepper.steps_per_degree
+            sleep = time.sleep
+            perf_counter = time.perf_counter
+            angle = self.angle
+            state = self.step_state
+            patterns = Stepper._patterns
+            dirty = Stepper._dirty
+            lane = self.motor_id - 1
+
+            # Pace steps against absolute deadlines: a relative sleep is
+            # measured from wakeup, so scheduler overshoot accumulates as
+            # phase drift over a 4096-step revolution.  Sleep coarsely to
+            # ~50 us before the deadline (yielding the CPU), then spin the
+            # last sliver for a tight, jitter-free cadence.
+            next_t = perf_counter() + delay_s
+
+            for step_num in range(1, numSteps + 1):
+                state = (state + direction) & 7   # % 8, but a single AND
+                patterns[lane] = preshifted[state]   # publish, writer does the I/O
+                dirty.set()
+
+                angle.value = (angle.value + deg_per_step) % 360.0
+                # No per-step print here: print(..., flush=True) is a write
+                # syscall per step (4096/rev), which alone wrecks the 1.2 ms
+                # cadence.  START/DONE report the move boundaries instead.
+
+                rest = next_t - perf_counter() - 50e-6
+                if rest > 0:
+                    sleep(rest)             # coarse wait, yields the CPU
+                while perf_counter() < next_t:
+                    pass                    # spin the last ~50 us
+                next_t += delay_s
+
+            self.step_state = state
+        finally:
+            self.lock.release()
+            # final angle report
+            print(f"[Motor {self.motor_id}] DONE rotate: final angle={self.angle.value:.2f}° (intended {target_angle:.2f}°)",
+                  flush=True)
+
+    # Command worker: executes queued moves one after another
+    def _worker(self):
+        _make_realtime(core=self.motor_id)   # one core per motor, writer on 0
+        while True:
+            cmd = self._cmd_q.get()
+            if cmd is None:           # sentinel: shut down
+                break
+            kind, value = cmd
+            if kind == "rel":
+                self.__rotate(value)
+            else:  # "abs" -- resolve the shortest delta at execution time
+                current = self.angle.value
+                delta = (value - current + 180.0) % 360.0 - 180.0
+                print(f"[Motor {self.motor_id}] goAngle: target={value:.2f}°, current={current:.2f}°, "
+                      f"delta(shortest)={delta:.2f}°", flush=True)
+                self.__rotate(delta)
+
+    # Public API ----------------------------------------------------------
+
+    def rotate(self, delta):
+        """Queue a relative rotation by delta degrees (non-blocking)."""
+        self._cmd_q.put(("rel", float(delta)))
+
+    def goAngle(self, target):
+        """Queue a move to an absolute angle via the shortest path (non-blocking)."""
+        self._cmd_q.put(("abs", float(target)))
+
+    def stop(self):
+        """Shut the worker down after pending commands finish."""
+        self._cmd_q.put(None)
+        self._worker_proc.join()
+
+    def zero(self):
+        """Set current angle to zero (shared)."""
+        self.angle.value = 0.0
+        print(f"[Motor {self.motor_id}] zeroed (angle set to 0.0°)", flush=True)
+
+
+# ---------------- Example usage / test harness ----------------
+if __name__ == '__main__':
+    import time
+
+    # Setup: adjust pins to match your wiring
+    s = Shifter(data=16, clock=21, latch=20)
+
+    # Use separate locks for true concurrent motion (give each motor its own lock)
+    lock1 = multiprocessing.Lock()
+    lock2 = multiprocessing.Lock()
+
+    # Instantiate motors
+    m1 = Stepper(s, lock1)
+    m2 = Stepper(s, lock2)
+
+    # Zero motors
+    m1.zero()
+    m2.zero()
+
+    time.sleep(0.5)
+    print("=== Starting lab test sequence with goAngle() ===", flush=True)
+
+    # Lab sequence (as required)
+    m1.goAngle(90)
+    m1.goAngle(-45)
+
+    m2.goAngle(-90)
+    m2.goAngle(45)
+
+    m1.goAngle(-135)
+    m1.goAngle(135)
+    m1.goAngle(0)
+
+    # Keep main alive so background processes can run
+    try:
+        while True:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        print("\nDemo interrupted by user. Exiting.", flush=True)
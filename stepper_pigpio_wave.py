@@ -0,0 +1,128 @@
+# stepper_pigpio_wave.py
+#
+# Stepper variant that offloads an entire rotation to pigpiod's DMA wave
+# engine instead of waking Python every step.  The normal Stepper sleeps
+# delay microseconds between steps, which costs a Python wakeup (with tens
+# of microseconds of jitter) 4096 times per revolution.  Here we build one
+# wave per sequence pattern -- there are only 8 -- and chain them with a
+# repeat count, so a single submission to pigpiod clocks out thousands of
+# steps with microsecond timing while Python just waits for it to finish.
+#
+# Needs the pigpio daemon running:  sudo pigpiod
+
+import time
+import pigpio
+
+
+class WaveStepper:
+    """
+    Single stepper on a shift register, driven by pigpio waves.
+    Each rotation is compiled into a wave chain and executed by DMA;
+    Python is not involved between steps.
+    """
+
+    seq = (0b0001,0b0011,0b0010,0b0110,0b0100,0b1100,0b1000,0b1001) # CCW sequence (tuple: fastest constant indexing)
+    delay = 1200          # delay between motor steps [us]
+    steps_per_degree = 4096/360
+
+    EDGE_US = 1           # data/clock edge spacing inside one byte shift [us]
+
+    def __init__(self, pi, data, clock, latch, bit_start=0):
+        self.pi = pi
+        self.dataPin = data
+        self.clockPin = clock
+        self.latchPin = latch
+        self.bit_start = bit_start   # where this motor's 4 bits sit in the register
+        self.angle = 0.0
+        self.step_state = 0
+
+        for p in (data, clock, latch):
+            pi.set_mode(p, pigpio.OUTPUT)
+            pi.write(p, 0)
+
+    # Build the pulse list that shifts one byte out and latches it,
+    # padded with idle time so the whole wave lasts one step period:
+    def _byte_pulses(self, databyte):
+        D, C, L = 1 << self.dataPin, 1 << self.clockPin, 1 << self.latchPin
+        pulses = []
+        used = 0
+        for i in range(8):
+            bit = (databyte >> i) & 1
+            on  = D if bit else 0
+            off = 0 if bit else D
+            pulses.append(pigpio.pulse(on, off, self.EDGE_US))          # set data
+            pulses.append(pigpio.pulse(C, 0, self.EDGE_US))             # clock high
+            pulses.append(pigpio.pulse(0, C, self.EDGE_US))             # clock low
+            used += 3 * self.EDGE_US
+        pulses.append(pigpio.pulse(L, 0, self.EDGE_US))                 # latch
+        pulses.append(pigpio.pulse(0, L + D, self.delay - used - self.EDGE_US))
+        return pulses
+
+    # One wave per step pattern, in the order this rotation will visit them:
+    def _pattern_waves(self, dir):
+        self.pi.wave_clear()
+        wids = []
+        state = self.step_state
+        for _ in range(8):
+            state = (state + dir) & 7   # % 8, but a single AND
+            byte = WaveStepper.seq[state] << self.bit_start
+            self.pi.wave_add_generic(self._byte_pulses(byte))
+            wids.append(self.pi.wave_create())
+        return wids
+
+    def __sgn(self, x):
+        return (x > 0) - (x < 0)   # branchless sign, no float division
+
+    # Blocking rotation, executed entirely by the DMA engine:
+    def rotate(self, delta):
+        numSteps = int(WaveStepper.steps_per_degree * abs(delta))
+        if numSteps == 0:
+            return
+        dir = self.__sgn(delta)
+
+        wids = self._pattern_waves(dir)
+        full_cycles, rem = divmod(numSteps, 8)
+
+        chain = []
+        if full_cycles:
+            # loop the 8-pattern cycle full_cycles times in one submission
+            chain += [255, 0] + wids + [255, 1,
+                                        full_cycles & 0xFF, full_cycles >> 8]
+        chain += wids[:rem]
+        self.pi.wave_chain(chain)
+
+        while self.pi.wave_tx_busy():
+            time.sleep(0.01)
+
+        for w in wids:
+            self.pi.wave_delete(w)
+
+        self.step_state = (self.step_state + dir * numSteps) & 7
+        self.angle = (self.angle + dir * numSteps / WaveStepper.steps_per_degree) % 360
+
+    def goAngle(self, target_angle):
+        delta = (target_angle - self.angle + 540) % 360 - 180
+        self.rotate(delta)
+
+    def zero(self):
+        self.angle = 0.0
+        self.step_state = 0
+
+
+# Example use:
+
+if __name__ == '__main__':
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise SystemExit("pigpiod not running (start it with: sudo pigpiod)")
+
+    m = WaveStepper(pi, data=16, clock=21, latch=20)
+    m.zero()
+
+    m.goAngle(90)
+    m.goAngle(-45)
+    m.goAngle(0)
+
+    pi.wave_clear()
+    pi.stop()
+    print('\nend')
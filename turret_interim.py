@@ -4,12 +4,14 @@
 # - Control two stepper axes (azimuth, elevation) from a web page.
 # - Uses socket-based HTTP like Lab 7.
 
+import os
 import socket
 import time
+import threading
 import multiprocessing
 import RPi.GPIO as GPIO
 
-from shifter import Shifter
+from shifter import Shifter, SpiShifter
 from stepper_class_shiftregister_multiprocessing import Stepper
 
 # ----------------- CONFIG -----------------
@@ -18,6 +20,12 @@ DATA_PIN  = 16
 LATCH_PIN = 20
 CLOCK_PIN = 21
 
+# Use the Pi's hardware SPI peripheral for the shift register instead of
+# bit-banging data/clock from Python: one kernel transfer per byte
+# (~5 us) instead of ~27 GPIO writes (~100 us).  Wire data to MOSI,
+# clock to SCLK, keep latch on LATCH_PIN, and enable SPI in raspi-config.
+USE_SPI = False
+
 # Angle limits for UI sliders (deg)
 AZ_MIN = -180
 AZ_MAX =  180
@@ -26,14 +34,68 @@ EL_MAX =  90
 
 HOST = ""       # listen on all interfaces
 PORT = 8080
+
+# Accept-loop processes sharing the one listen socket: a GET for the
+# page never queues behind a connection that is busy parsing a POST.
+# 2 is plenty on a Pi; the motor workers are separate processes anyway.
+WORKERS = 2
+
+# Keep-alive: the browser's fetch() reuses its HTTP/1.1 socket, so a
+# slider drag stops paying a TCP handshake + slow start per event.
+KEEPALIVE_TIMEOUT = 5.0
 # ------------------------------------------
 
 
+_parent_pid = os.getpid()   # GPIO cleanup belongs to this process only
+
 # Globals for motors
 s = None
 m_az = None   # azimuth motor
 m_el = None   # elevation motor
 
+# Latest-target dispatch: dragging a slider fires dozens of POSTs with
+# intermediate angles, and queueing each one makes the motor play back
+# the whole drag.  Each axis keeps only the newest target (plain float:
+# a single write is atomic under the GIL); a dispatcher thread lets the
+# burst settle and queues one move to the latest value.
+DEBOUNCE = 0.05   # seconds to let a slider burst settle
+
+_az_target = 0.0
+_el_target = 0.0
+_az_evt = threading.Event()
+_el_evt = threading.Event()
+
+
+def _dispatch_loop(axis):
+    evt = _az_evt if axis == "az" else _el_evt
+    last = None   # drags emit duplicate values; don't queue a no-op move
+    while True:
+        evt.wait()
+        time.sleep(DEBOUNCE)   # let the rest of the burst land first
+        evt.clear()
+        target = _az_target if axis == "az" else _el_target
+        if target == last:
+            continue
+        motor = m_az if axis == "az" else m_el
+        if motor is not None:
+            motor.goAngle(target)
+            last = target
+
+
+def _pin_process(pid, core):
+    """Best-effort: pin a motor process to one core (keeps its cache
+    warm) and raise it to SCHED_FIFO so step timing isn't at the mercy
+    of the CFS tick.  Both silently fall back without privileges
+    (SCHED_FIFO needs CAP_SYS_NICE)."""
+    try:
+        os.sched_setaffinity(pid, {core % os.cpu_count()})
+    except OSError:
+        pass
+    try:
+        os.sched_setscheduler(pid, os.SCHED_FIFO, os.sched_param(50))
+    except (PermissionError, OSError):
+        pass
+
 
 def setup_motors():
     """Set up GPIO, shift register, and stepper motors."""
@@ -42,8 +104,12 @@ def setup_motors():
     GPIO.setwarnings(False)
     GPIO.setmode(GPIO.BCM)
 
-    # One shared shifter for both motors (like Lab 8)
-    s = Shifter(data=DATA_PIN, latch=LATCH_PIN, clock=CLOCK_PIN)
+    # One shared shifter for both motors (like Lab 8); SpiShifter has the
+    # same shiftByte interface so the Stepper class doesn't care which
+    if USE_SPI:
+        s = SpiShifter(latch=LATCH_PIN)
+    else:
+        s = Shifter(data=DATA_PIN, latch=LATCH_PIN, clock=CLOCK_PIN)
 
     # Each motor gets its own lock
     lock1 = multiprocessing.Lock()
@@ -56,34 +122,46 @@ def setup_motors():
     # Set current positions to 0°
     m_az.zero()
     m_el.zero()
+
+    # HTTP loop on core 0, one motor worker on each of cores 1 and 2,
+    # the shared register flusher on core 3 -- no cross-core migration
+    # evicting the tight stepping loops' cache lines
+    try:
+        os.sched_setaffinity(0, {0})
+    except OSError:
+        pass
+    _pin_process(m_az.worker.pid, 1)
+    _pin_process(m_el.worker.pid, 2)
+    if Stepper._flusher is not None:
+        _pin_process(Stepper._flusher.pid, 3)
     print("Motors initialized (azimuth and elevation at 0°).")
 
 
+def _start_dispatchers():
+    # one dispatcher thread per axis (daemons die with the server).
+    # Started per accept process, not in setup_motors: threads do not
+    # survive fork(), and the motor queues are fork-shared anyway.
+    threading.Thread(target=_dispatch_loop, args=("az",), daemon=True).start()
+    threading.Thread(target=_dispatch_loop, args=("el",), daemon=True).start()
+
+
 # ---------- Tiny HTTP helpers (Lab-7 style) ----------
 
+# Requests are parsed as bytes: decoding 8 KiB to str and re-splitting
+# it several times cost more than the ~25-byte body being parsed.
+
 def recv_request(conn):
-    return conn.recv(8192).decode("utf-8", errors="ignore")
+    return conn.recv(8192)   # raw bytes, parsed in place below
 
-def parse_request_line(req_text):
-    first = req_text.split("\r\n", 1)[0]
-    parts = first.split()
+def parse_request_line(req):
+    i = req.find(b"\r\n")
+    parts = req[:i if i >= 0 else len(req)].split(b" ", 2)
     if len(parts) >= 2:
-        return parts[0], parts[1]  # method, path
-    return "GET", "/"
-
-def parse_post_body(req_text):
-    i = req_text.find("\r\n\r\n")
-    if i < 0:
-        return {}
-    body = req_text[i+4:]
-    out = {}
-    for pair in body.split("&"):
-        if "=" in pair:
-            k, v = pair.split("=", 1)
-            out[k] = v
-    return out
+        return parts[0], parts[1]  # method, path (bytes)
+    return b"GET", b"/"
 
 def send_html(conn, html):
+    # error-path helper: closes the connection after sending
     header = (
         "HTTP/1.1 200 OK\r\n"
         "Content-Type: text/html\r\n"
@@ -91,13 +169,22 @@ def send_html(conn, html):
     )
     conn.sendall(header.encode("utf-8") + html.encode("utf-8"))
 
-def send_json(conn, obj_str):
-    header = (
-        "HTTP/1.1 200 OK\r\n"
-        "Content-Type: application/json\r\n"
-        "Connection: close\r\n\r\n"
-    )
-    conn.sendall(header.encode("utf-8") + obj_str.encode("utf-8"))
+def _json_resp(body_str):
+    # build a complete JSON response once; the status replies never
+    # change, so the handlers just sendall prebuilt bytes -- no
+    # per-request encode or concatenation at all
+    body = body_str.encode("utf-8")
+    return (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: keep-alive\r\n"
+        b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+    ) + body
+
+_OK_RESP      = _json_resp('{"status":"ok"}')
+_ZEROED_RESP  = _json_resp('{"status":"zeroed"}')
+_UNKNOWN_RESP = _json_resp('{"status":"unknown"}')
 
 # -------------- Web page (HTML + JS) --------------
 
@@ -149,13 +236,45 @@ def page_html():
       }}
     }}
 
+    // Coalesce slider bursts client-side: "input" fires 60+ times/sec
+    // during a drag, but only the newest value per axis matters.  Keep
+    // one pending value per axis, flush on animation frames, and hold
+    // a minimum 50 ms gap per axis so the network sees ~20 POSTs/s.
+    let pending = {{}};
+    let queued = false;
+    const lastSent = {{}};
+    const MIN_GAP_MS = 50;
+
+    function flush() {{
+      queued = false;
+      const now = performance.now();
+      for (const axis in pending) {{
+        if (lastSent[axis] && now - lastSent[axis] < MIN_GAP_MS) {{
+          queued = true;              // too soon: retry next frame
+          continue;
+        }}
+        sendAngle(axis, pending[axis]);
+        lastSent[axis] = now;
+        delete pending[axis];
+      }}
+      if (queued) requestAnimationFrame(flush);
+    }}
+
+    function queueAngle(axis, val) {{
+      pending[axis] = val;
+      if (!queued) {{
+        queued = true;
+        requestAnimationFrame(flush);
+      }}
+    }}
+
     function attachSlider(id, spanId, axisName) {{
       const slider = document.getElementById(id);
       const label  = document.getElementById(spanId);
       slider.addEventListener("input", (e) => {{
         const val = e.target.value;
-        label.textContent = val;
-        sendAngle(axisName, val);
+        label.textContent = val;   // label still tracks every event
+        queueAngle(axisName, val);
       }});
     }}
 
@@ -178,23 +297,53 @@ def page_html():
 </html>"""
 
 
-# -------------- Request handling --------------
+# The page only interpolates module constants, so it is identical for
+# every request: render and encode it once at import instead of on every
+# GET.  Content-Length lets the browser finish without waiting for FIN.
+_PAGE_HTML_BYTES = page_html().encode("utf-8")
+_PAGE_HEADER = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/html\r\n"
+    b"Content-Length: " + str(len(_PAGE_HTML_BYTES)).encode() + b"\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+)
 
-def handle_post_set(req_text):
-    """Handle POST /set: axis=az|el  angle=<deg>"""
-    data = parse_post_body(req_text)
-    axis  = data.get("axis", "")
-    angle_str = data.get("angle", "0")
 
+# -------------- Request handling --------------
+
+def handle_post_set(req):
+    """Handle POST /set: axis=az|el  angle=<deg>
+
+    The body has exactly two known keys, so the values are sliced
+    straight out of the bytes instead of building a dict.
+    """
+    j = req.find(b"\r\n\r\n")
+    if j < 0:
+        return
+    body = req[j + 4:]
+
+    a = body.find(b"axis=")
+    g = body.find(b"angle=")
+    if a < 0 or g < 0:
+        return
+    end = body.find(b"&", a)
+    axis = body[a + 5:end if end >= 0 else len(body)]
+    end = body.find(b"&", g)
     try:
-        angle = float(angle_str)
+        angle = float(body[g + 6:end if end >= 0 else len(body)])
     except ValueError:
         angle = 0.0
 
-    if axis == "az" and m_az is not None:
-        m_az.goAngle(angle)
-    elif axis == "el" and m_el is not None:
-        m_el.goAngle(angle)
+    # publish the newest target and return; the dispatcher thread does
+    # the (queued) motor call, so bursts coalesce to the latest value
+    global _az_target, _el_target
+    if axis == b"az":
+        _az_target = angle
+        _az_evt.set()
+    elif axis == b"el":
+        _el_target = angle
+        _el_evt.set()
 
 def handle_post_zero():
     """Zero both motors."""
@@ -209,33 +358,64 @@ def handle_post_zero():
 def run_server():
     s_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Disable Nagle: our responses are tiny ({"status":"ok"}) and Nagle
+    # holds them in the send buffer up to ~40 ms waiting for more data,
+    # which turns every slider drag into a visible lag.
+    s_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # lets another listener bind the same port (and the kernel balance
+    # accepts between them) if one is started later
+    s_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     s_sock.bind((HOST, PORT))
     s_sock.listen(5)
 
+    # fork WORKERS-1 children; everyone accepts on the inherited socket
+    # and the kernel hands each connection to exactly one of us
+    for _ in range(WORKERS - 1):
+        if os.fork() == 0:
+            break
+    _start_dispatchers()
+
     print(f"Serving on http://{HOST or 'raspberrypi.local'}:{PORT}")
     print("Move sliders in your browser to command the turret.")
     try:
         while True:
             conn, addr = s_sock.accept()
+            # accepted sockets usually inherit TCP_NODELAY from the
+            # listener, but set it explicitly to be sure
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # serve multiple requests per connection (keep-alive) until
+            # the client goes quiet or hangs up
+            conn.settimeout(KEEPALIVE_TIMEOUT)
             try:
-                req = recv_request(conn)
-                method, path = parse_request_line(req)
-
-                if method == "GET":
-                    # only serve main page at "/"
-                    send_html(conn, page_html())
-
-                elif method == "POST":
-                    if path == "/set":
-                        handle_post_set(req)
-                        send_json(conn, '{{"status":"ok"}}')
-                    elif path == "/zero":
-                        handle_post_zero()
-                        send_json(conn, '{{"status":"zeroed"}}')
+                while True:
+                    try:
+                        req = recv_request(conn)
+                    except socket.timeout:
+                        break
+                    if not req:     # client closed its end
+                        break
+                    method, path = parse_request_line(req)
+
+                    if method == b"GET":
+                        # only serve main page at "/" (pre-rendered bytes)
+                        conn.sendall(_PAGE_HEADER + _PAGE_HTML_BYTES)
+
+                    elif method == b"POST":
+                        if path == b"/set":
+                            handle_post_set(req)
+                            conn.sendall(_OK_RESP)
+                        elif path == b"/zero":
+                            handle_post_zero()
+                            conn.sendall(_ZEROED_RESP)
+                        else:
+                            conn.sendall(_UNKNOWN_RESP)
                     else:
-                        send_json(conn, '{{"status":"unknown"}}')
-                else:
-                    send_html(conn, "<h1>Unsupported method</h1>")
+                        send_html(conn, "<h1>Unsupported method</h1>")
+                        break       # error path still closes
+            except OSError as e:
+                # a reset or half-open client must not kill the accept
+                # loop: log it and keep serving
+                print(f"connection error from {addr}: {e}")
             finally:
                 conn.close()
     finally:
@@ -251,9 +431,13 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nStopping server...")
     finally:
-        # Release everything cleanly
-        if s is not None:
-            s.shiftByte(0)  # turn off coils
-        time.sleep(0.1)
-        GPIO.cleanup()
-        print("GPIO cleaned up.")
\ No newline at end of file
+        # Release everything cleanly -- but only in the original process,
+        # so a forked accept worker can't yank the GPIO state away
+        if os.getpid() == _parent_pid:
+            if s is not None:
+                s.shiftByte(0)  # turn off coils
+            # no settle sleep: shiftByte returns after the latch pulse,
+            # and the 74HC595 propagates in nanoseconds, so the outputs
+            # are already low before GPIO.cleanup() runs
+            GPIO.cleanup()
+            print("GPIO cleaned up.")
\ No newline at end of file
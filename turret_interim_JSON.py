@@ -8,12 +8,15 @@
 
 import socket
 import time
+import threading
 import multiprocessing
 import json
 import urllib.request
 import os
 import RPi.GPIO as GPIO
 
+_parent_pid = os.getpid()   # GPIO cleanup belongs to this process only
+
 from shifter import Shifter
 from stepper_class_shiftregister_multiprocessing import Stepper
 
@@ -34,6 +37,13 @@ EL_MAX =  90
 HOST = ""   # listen on all interfaces
 PORT = 8080
 
+# accept-loop processes sharing the one listen socket (see
+# turret_interim.py); each runs its own dispatcher + poller threads
+WORKERS = 2
+
+# keep-alive: reuse the browser's socket across slider events
+KEEPALIVE_TIMEOUT = 5.0
+
 # ---------- JSON CONFIG ----------
 USE_LOCAL_JSON = True
 LOCAL_JSON_FILE = "positions.json"
@@ -53,25 +63,100 @@ my_turret = None
 other_turrets = {}
 globes = []
 
+# Latest-target dispatch (same scheme as turret_interim.py): a slider
+# drag fires many POSTs; keep only the newest angle per axis and let a
+# dispatcher thread queue one move after the burst settles.
+DEBOUNCE = 0.05
+
+_az_target = 0.0
+_el_target = 0.0
+_az_evt = threading.Event()
+_el_evt = threading.Event()
+
+
+def _dispatch_loop(axis):
+    evt = _az_evt if axis == "az" else _el_evt
+    last = None   # skip no-op moves from duplicate slider values
+    while True:
+        evt.wait()
+        time.sleep(DEBOUNCE)
+        evt.clear()
+        target = _az_target if axis == "az" else _el_target
+        if target == last:
+            continue
+        motor = m_az if axis == "az" else m_el
+        if motor is not None:
+            motor.goAngle(target)
+            last = target
+
+
+# Positions are refreshed by a background thread, never in the request
+# loop, so a slow/dead JSON server can't block motor commands.
+_positions_lock = threading.Lock()
+POLL_PERIOD = 0.5        # seconds between poll attempts
+REFRESH_MIN = 1.0        # don't re-fetch if the last success was this recent
+
+# /coords response, serialized once per positions refresh instead of
+# once per request; rebinding the global is atomic so the handler just
+# reads it
+_COORDS_RESP = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\nConnection: keep-alive\r\nKeep-Alive: timeout=5, max=1000\r\n\r\n{}"
+
+
+def _rebuild_coords_cache(data):
+    global _COORDS_RESP
+    body = json.dumps(data, indent=2).encode("utf-8")
+    _COORDS_RESP = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: keep-alive\r\n"
+        b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+    ) + body
+
 
 # ===========================================================
 #       ### JSON LOADING SECTION ###
 # ===========================================================
 
-def load_positions():
+def load_positions(verbose=True):
     """Load turret/globe JSON from local file or URL."""
     if USE_LOCAL_JSON:
         if not os.path.exists(LOCAL_JSON_FILE):
-            print(f"ERROR: Local file '{LOCAL_JSON_FILE}' not found!")
+            if verbose:
+                print(f"ERROR: Local file '{LOCAL_JSON_FILE}' not found!")
             return None
-        print(f"Loading JSON from local file: {LOCAL_JSON_FILE}")
+        if verbose:
+            print(f"Loading JSON from local file: {LOCAL_JSON_FILE}")
         with open(LOCAL_JSON_FILE, "r") as f:
             return json.load(f)
     else:
-        print(f"Loading JSON from URL: {JSON_URL}")
-        with urllib.request.urlopen(JSON_URL) as response:
-            data = response.read().decode("utf-8")
-            return json.loads(data)
+        if verbose:
+            print(f"Loading JSON from URL: {JSON_URL}")
+        # short timeout: the poller thread shouldn't back up behind a
+        # dead server
+        with urllib.request.urlopen(JSON_URL, timeout=0.2) as response:
+            # json.loads parses bytes directly -- no separate decode pass
+            return json.loads(response.read())
+
+
+def _poller():
+    """Background daemon: keep the positions cache fresh without ever
+    touching the HTTP request path."""
+    global positions
+    last_ok = 0.0
+    while True:
+        now = time.monotonic()
+        if now - last_ok >= REFRESH_MIN:
+            try:
+                data = load_positions(verbose=False)
+            except Exception:
+                data = None      # dead server: keep serving the old cache
+            if data is not None:
+                with _positions_lock:
+                    positions = data
+                _rebuild_coords_cache(data)
+                last_ok = time.monotonic()
+        time.sleep(POLL_PERIOD)
 
 
 def process_positions():
@@ -101,6 +186,19 @@ def process_positions():
 #              MOTOR + SERVER SECTION
 # ===========================================================
 
+def _pin_process(pid, core):
+    # best effort (same as turret_interim.py): keep each motor worker on
+    # its own core and on SCHED_FIFO; silently degrade without privileges
+    try:
+        os.sched_setaffinity(pid, {core % os.cpu_count()})
+    except OSError:
+        pass
+    try:
+        os.sched_setscheduler(pid, os.SCHED_FIFO, os.sched_param(50))
+    except (PermissionError, OSError):
+        pass
+
+
 def setup_motors():
     global s, m_az, m_el
 
@@ -117,43 +215,56 @@ def setup_motors():
 
     m_az.zero()
     m_el.zero()
+
+    # HTTP on core 0, motor workers on 1 and 2, flusher on 3
+    try:
+        os.sched_setaffinity(0, {0})
+    except OSError:
+        pass
+    _pin_process(m_az.worker.pid, 1)
+    _pin_process(m_el.worker.pid, 2)
+    if Stepper._flusher is not None:
+        _pin_process(Stepper._flusher.pid, 3)
     print("Motors initialized at 0°.")
 
 
+def _start_threads():
+    # per-process helpers: threads don't survive fork(), so each accept
+    # worker starts its own dispatchers and positions poller
+    threading.Thread(target=_dispatch_loop, args=("az",), daemon=True).start()
+    threading.Thread(target=_dispatch_loop, args=("el",), daemon=True).start()
+    threading.Thread(target=_poller, daemon=True).start()
+
+
 # ---- HTTP Helpers ----
 
+# Parse requests as bytes in a single pass: decoding 8 KiB to str and
+# splitting it repeatedly cost more than the tiny body being parsed.
+
 def recv_request(conn):
-    return conn.recv(8192).decode("utf-8", errors="ignore")
-
-def parse_request_line(req_text):
-    first = req_text.split("\r\n", 1)[0]
-    parts = first.split()
-    return parts[0], parts[1] if len(parts) >= 2 else ( "GET", "/" )
-
-def parse_post_body(req_text):
-    i = req_text.find("\r\n\r\n")
-    if i < 0: return {}
-    body = req_text[i+4:]
-    out = {}
-    for pair in body.split("&"):
-        if "=" in pair:
-            k, v = pair.split("=", 1)
-            out[k] = v
-    return out
-
-def send_html(conn, html):
-    conn.sendall((
-        "HTTP/1.1 200 OK\r\n"
-        "Content-Type: text/html\r\n"
-        "Connection: close\r\n\r\n"
-    ).encode() + html.encode())
-
-def send_json(conn, obj):
-    conn.sendall((
-        "HTTP/1.1 200 OK\r\n"
-        "Content-Type: application/json\r\n"
-        "Connection: close\r\n\r\n"
-    ).encode() + obj.encode())
+    return conn.recv(8192)   # raw bytes
+
+def parse_request_line(req):
+    i = req.find(b"\r\n")
+    parts = req[:i if i >= 0 else len(req)].split(b" ", 2)
+    if len(parts) >= 2:
+        return parts[0], parts[1]
+    return b"GET", b"/"
+
+def _json_resp(body_str):
+    # prebuilt JSON response bytes (see turret_interim.py): the status
+    # replies are constant, so no per-request encoding
+    body = body_str.encode()
+    return (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: keep-alive\r\n"
+        b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+    ) + body
+
+_OK_RESP     = _json_resp('{"status":"ok"}')
+_ZEROED_RESP = _json_resp('{"status":"zeroed"}')
 
 
 # ---- HTML PAGE SAME AS BEFORE ----
@@ -189,13 +300,43 @@ async function sendAngle(axis, angle) {{
   }});
 }}
 
+// coalesce slider bursts: one pending value per axis, flushed on
+// animation frames with a 50 ms minimum gap (same as turret_interim.py)
+let pending = {{}};
+let queued = false;
+const lastSent = {{}};
+const MIN_GAP_MS = 50;
+
+function flush() {{
+  queued = false;
+  const now = performance.now();
+  for (const axis in pending) {{
+    if (lastSent[axis] && now - lastSent[axis] < MIN_GAP_MS) {{
+      queued = true;
+      continue;
+    }}
+    sendAngle(axis, pending[axis]);
+    lastSent[axis] = now;
+    delete pending[axis];
+  }}
+  if (queued) requestAnimationFrame(flush);
+}}
+
+function queueAngle(axis, val) {{
+  pending[axis] = val;
+  if (!queued) {{
+    queued = true;
+    requestAnimationFrame(flush);
+  }}
+}}
+
 document.getElementById("az").oninput = e => {{
   az_val.textContent = e.target.value;
-  sendAngle("az", e.target.value);
+  queueAngle("az", e.target.value);
 }};
 document.getElementById("el").oninput = e => {{
   el_val.textContent = e.target.value;
-  sendAngle("el", e.target.value);
+  queueAngle("el", e.target.value);
 }};
 
 async function zeroAll() {{
@@ -209,15 +350,45 @@ async function zeroAll() {{
 </html>"""
 
 
-# ---- POST Handlers ----
+# Page only interpolates the slider-limit constants, so render + encode
+# it once at import; a GET then costs one sendall of prebuilt bytes.
+_PAGE_HTML_BYTES = page_html().encode("utf-8")
+_PAGE_HEADER = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/html\r\n"
+    b"Content-Length: " + str(len(_PAGE_HTML_BYTES)).encode() + b"\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+)
 
-def handle_post_set(req_text):
-    data = parse_post_body(req_text)
-    axis = data.get("axis", "")
-    angle = float(data.get("angle", "0"))
 
-    if axis == "az":  m_az.goAngle(angle)
-    if axis == "el":  m_el.goAngle(angle)
+# ---- POST Handlers ----
+
+def handle_post_set(req):
+    # two known keys: slice values straight from the bytes, no dict
+    j = req.find(b"\r\n\r\n")
+    if j < 0: return
+    body = req[j+4:]
+
+    a = body.find(b"axis=")
+    g = body.find(b"angle=")
+    if a < 0 or g < 0: return
+    end = body.find(b"&", a)
+    axis = body[a+5:end if end >= 0 else len(body)]
+    end = body.find(b"&", g)
+    try:
+        angle = float(body[g+6:end if end >= 0 else len(body)])
+    except ValueError:
+        angle = 0.0
+
+    # publish newest target; dispatcher thread coalesces the burst
+    global _az_target, _el_target
+    if axis == b"az":
+        _az_target = angle
+        _az_evt.set()
+    if axis == b"el":
+        _el_target = angle
+        _el_evt.set()
 
 def handle_post_zero():
     m_az.zero()
@@ -229,31 +400,57 @@ def handle_post_zero():
 def run_server():
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Disable Nagle: tiny JSON replies otherwise sit in the send buffer
+    # for up to ~40 ms waiting to be coalesced with data that never comes.
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     sock.bind((HOST, PORT))
     sock.listen(5)
 
+    # fork the extra accept workers; the kernel load-balances accepts
+    for _ in range(WORKERS - 1):
+        if os.fork() == 0:
+            break
+    _start_threads()
+
     print(f"Serving at http://raspberrypi.local:{PORT}")
 
     while True:
         conn, addr = sock.accept()
-        req = recv_request(conn)
-        method, path = parse_request_line(req)
-
-        if method == "GET":
-            if path == "/coords":
-                send_json(conn, json.dumps(positions, indent=2))
-            else:
-                send_html(conn, page_html())
-
-        elif method == "POST":
-            if path == "/set":
-                handle_post_set(req)
-                send_json(conn, '{"status":"ok"}')
-            elif path == "/zero":
-                handle_post_zero()
-                send_json(conn, '{"status":"zeroed"}')
-
-        conn.close()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.settimeout(KEEPALIVE_TIMEOUT)
+        try:
+            # keep-alive: serve requests on this socket until the
+            # client goes quiet or hangs up
+            while True:
+                try:
+                    req = recv_request(conn)
+                except socket.timeout:
+                    break
+                if not req:
+                    break
+                method, path = parse_request_line(req)
+
+                if method == b"GET":
+                    if path == b"/coords":
+                        # pre-serialized on refresh: one sendall
+                        conn.sendall(_COORDS_RESP)
+                    else:
+                        conn.sendall(_PAGE_HEADER + _PAGE_HTML_BYTES)
+
+                elif method == b"POST":
+                    if path == b"/set":
+                        handle_post_set(req)
+                        conn.sendall(_OK_RESP)
+                    elif path == b"/zero":
+                        handle_post_zero()
+                        conn.sendall(_ZEROED_RESP)
+        except OSError as e:
+            # one bad client (reset, half-open, garbage request) must
+            # not take down the accept loop: log and move on
+            print(f"connection error from {addr}: {e}")
+        finally:
+            conn.close()
 
 
 # ===========================================================
@@ -266,14 +463,19 @@ if __name__ == "__main__":
 
         positions = load_positions()
         process_positions()  # <-- prints your turret, others, globes
+        _rebuild_coords_cache(positions)   # first /coords bytes
 
+        # run_server forks the accept workers and starts the poller +
+        # dispatcher threads in each of them
         run_server()
 
     except KeyboardInterrupt:
         print("Shutting down...")
 
     finally:
-        if s:
-            s.shiftByte(0)
-        GPIO.cleanup()
-        print("GPIO cleaned up.")
+        # only the original process owns the GPIO state
+        if os.getpid() == _parent_pid:
+            if s:
+                s.shiftByte(0)
+            GPIO.cleanup()
+            print("GPIO cleaned up.")
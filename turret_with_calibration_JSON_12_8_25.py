@@ -1,10 +1,15 @@
 import socket
 import time
+import threading
 import multiprocessing
 import json
 import math
+import re
 import urllib.request
+import urllib.parse
+import urllib.error
 import os
+import sys
 import RPi.GPIO as GPIO
 
 from shifter import Shifter
@@ -25,6 +30,10 @@ EL_MAX =  90
 HOST = ""   # Listen on all interfaces
 PORT = 8080
 
+# keep-alive: the UI fires several fetches (/coords, /aim, /trim) and
+# reusing one TCP session avoids a handshake per request
+KEEPALIVE_TIMEOUT = 5.0
+
 USE_LOCAL_JSON = True          # local json for testing
 LOCAL_JSON_FILE = "positions.json"
 JSON_URL = "http://192.168.1.254:8000/positions.json"        # actual json url for final project
@@ -36,6 +45,8 @@ MY_TEAM = "3"
 s = None
 m_az = None
 m_el = None
+ctrl_az = None   # MotorController per axis (set up with the motors)
+ctrl_el = None
 
 positions = {}      # dict for turret and globe locations
 my_turret = None
@@ -45,45 +56,71 @@ globes = []
 
 # json function defs
 
+# reload cache: skip reparsing when the file mtime (or the server ETag)
+# says the data hasn't changed since last time
+_positions_cache = {"mtime": 0, "data": None, "etag": None}
+
 def load_positions():
     # load json from local file or url
     if USE_LOCAL_JSON:
         if not os.path.exists(LOCAL_JSON_FILE):
             print(f"ERROR: Local file '{LOCAL_JSON_FILE}' not found!")
             return None
+        mtime = os.stat(LOCAL_JSON_FILE).st_mtime
+        if _positions_cache["data"] is not None and mtime == _positions_cache["mtime"]:
+            return _positions_cache["data"]
         print(f"Loading JSON from local file: {LOCAL_JSON_FILE}")
         with open(LOCAL_JSON_FILE, "r") as f:
-            return json.load(f)
+            data = json.load(f)
+        _positions_cache["mtime"] = mtime
+        _positions_cache["data"] = data
+        return data
     else:
         print(f"Loading JSON from URL: {JSON_URL}")
-        with urllib.request.urlopen(JSON_URL) as response:
-            data = response.read().decode("utf-8")
-            return json.loads(data)
+        req = urllib.request.Request(JSON_URL)
+        if _positions_cache["etag"]:
+            req.add_header("If-None-Match", _positions_cache["etag"])
+        try:
+            # bounded timeout so a dead host can't hang startup forever
+            with urllib.request.urlopen(req, timeout=2) as response:
+                # json.loads takes bytes directly, no separate decode pass
+                data = json.loads(response.read())
+                _positions_cache["etag"] = response.headers.get("ETag")
+                _positions_cache["data"] = data
+                return data
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and _positions_cache["data"] is not None:
+                return _positions_cache["data"]   # unchanged on the server
+            raise
 
 
 # ----------------------------------------------------------
 # Compute Azimuth and Elevation angles
 # ----------------------------------------------------------
-def compute_az_el(my_pos, target_pos):
-    # unpack
-    r1, th1, z1 = my_pos["r"], my_pos["theta"], my_pos.get("z", 0)
+def polar_to_xy(r, theta):
+    # theta is in radians in positions.json
+    return r * math.cos(theta), r * math.sin(theta)
+
+
+def compute_az_el(my_xyz, target_pos):
+    # our own XY is the same for every target, so the caller converts
+    # it once and passes it in instead of redoing the trig per target
+    x1, y1, z1 = my_xyz
     r2, th2, z2 = target_pos["r"], target_pos["theta"], target_pos.get("z", 0)
 
-    # convert to XY
-    x1, y1 = polar_to_xy(r1, th1)
+    # convert target to XY
     x2, y2 = polar_to_xy(r2, th2)
 
     dx = x2 - x1
     dy = y2 - y1
     dz = z2 - z1
 
-    # horizontal distance in XY plane
-    horizontal_dist = math.sqrt(dx*dx + dy*dy)
+    # horizontal distance in XY plane (hypot: one C call, no overflow)
+    horizontal_dist = math.hypot(dx, dy)
 
     # --- AZIMUTH ---
+    # atan2 already returns [-180, 180] after degrees(); no wrapping needed
     az = math.degrees(math.atan2(dy, dx))
-    if az > 180: az -= 360
-    if az < -180: az += 360
 
     # --- ELEVATION ---
     el = math.degrees(math.atan2(dz, horizontal_dist))
@@ -94,16 +131,62 @@ def compute_az_el(my_pos, target_pos):
 # ----------------------------------------------------------
 #  Load / Save Aim Calibration File
 # ----------------------------------------------------------
+# The aim file is kept in memory: every /aim and /save_cal used to
+# re-read and re-parse the JSON from disk, and computing targets
+# rewrote it.  Now the dict is loaded once, handlers hit the cache,
+# and the disk is only touched when /save_cal flushes dirty data.
+AIM_CACHE = None
+AIM_DIRTY = False
+
+
+# calibration keys are ("turret", "3", "az") tuples in memory -- no
+# f-string build per lookup -- and flattened back to "turret_3_az"
+# strings only when serialized, since JSON can't store tuple keys
+
+def _decode_cal_keys(cal):
+    out = {}
+    for key, off in cal.items():
+        try:
+            kind, ident, axis_name = key.rsplit("_", 2)
+        except (ValueError, AttributeError):
+            continue
+        out[(kind, ident, axis_name)] = off
+    return out
+
+
+def _encode_cal_keys(cal):
+    return {"_".join(key): off for key, off in cal.items()}
+
+
 def load_aim_file():
-    if os.path.exists(AIM_FILE):
-        with open(AIM_FILE, "r") as f:
-            return json.load(f)
-    return {"calibration": {}, "angles": {}}
+    global AIM_CACHE
+    if AIM_CACHE is None:
+        if os.path.exists(AIM_FILE):
+            with open(AIM_FILE, "r") as f:
+                AIM_CACHE = json.load(f)
+            AIM_CACHE["calibration"] = _decode_cal_keys(
+                AIM_CACHE.get("calibration", {}))
+        else:
+            AIM_CACHE = {"calibration": {}, "angles": {}}
+    return AIM_CACHE
 
 
 def save_aim_file(data):
-    with open(AIM_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    # update the cache and mark it dirty; flush_aim_file does the disk IO
+    global AIM_CACHE, AIM_DIRTY
+    AIM_CACHE = data
+    AIM_DIRTY = True
+
+
+def flush_aim_file():
+    # write the cache out only if something actually changed
+    global AIM_DIRTY
+    if AIM_DIRTY:
+        on_disk = dict(AIM_CACHE)
+        on_disk["calibration"] = _encode_cal_keys(AIM_CACHE["calibration"])
+        with open(AIM_FILE, "w") as f:
+            json.dump(on_disk, f, indent=2)
+        AIM_DIRTY = False
 
 
 # ----------------------------------------------------------
@@ -114,34 +197,32 @@ def compute_all_target_angles(my_team, positions):
     globes = positions["globes"]
 
     my_pos = turrets[my_team]
+    # convert our own position once; every target shares it
+    x1, y1 = polar_to_xy(my_pos["r"], my_pos["theta"])
+    my_xyz = (x1, y1, my_pos.get("z", 0))
 
     aim_data = load_aim_file()
     aim_data.setdefault("angles", {})
     aim_data["angles"].setdefault("turrets", {})
     aim_data["angles"].setdefault("globes", {})
+    cal = aim_data["calibration"]   # tuple keys, looked up directly below
 
-    # ---- Turrets ----
-    for tid, tpos in turrets.items():
-        if tid == my_team: 
-            continue
-        az, el = compute_az_el(my_pos, tpos)
+    # ---- All targets, one pass ----
+    # turrets and globes used to have twin loops; concatenating them
+    # into one worklist runs a single loop body over both sets
+    work = [("turrets", "turret", tid, tpos)
+            for tid, tpos in turrets.items() if tid != my_team]
+    work += [("globes", "globe", str(i), gpos)
+             for i, gpos in enumerate(globes)]
 
-        cal_az = aim_data["calibration"].get(f"turret_{tid}_az", 0)
-        cal_el = aim_data["calibration"].get(f"turret_{tid}_el", 0)
+    for bucket, kind, ident, tpos in work:
+        az, el = compute_az_el(my_xyz, tpos)
 
-        aim_data["angles"]["turrets"][tid] = {
-            "az": az + cal_az,
-            "el": el + cal_el
-        }
+        cal_az = cal.get((kind, ident, "az"), 0.0)
+        cal_el = cal.get((kind, ident, "el"), 0.0)
 
-    # ---- Globes ----
-    for i, gpos in enumerate(globes):
-        az, el = compute_az_el(my_pos, gpos)
-
-        cal_az = aim_data["calibration"].get(f"globe_{i}_az", 0)
-        cal_el = aim_data["calibration"].get(f"globe_{i}_el", 0)
-
-        aim_data["angles"]["globes"][i] = {
+        key = ident if bucket == "turrets" else int(ident)
+        aim_data["angles"][bucket][key] = {
             "az": az + cal_az,
             "el": el + cal_el
         }
@@ -150,6 +231,20 @@ def compute_all_target_angles(my_team, positions):
     return aim_data["angles"]
 
 
+# memoized angle table: the trig over every target only reruns when the
+# inputs (positions or calibration offsets) actually change
+_angles_cache = {"key": None, "angles": None}
+
+def get_angles():
+    cal = load_aim_file().get("calibration", {})
+    # tuple keys sort and compare directly; json.dumps can't serialize them
+    key = (json.dumps(positions, sort_keys=True), tuple(sorted(cal.items())))
+    if key != _angles_cache["key"]:
+        _angles_cache["angles"] = compute_all_target_angles(MY_TEAM, positions)
+        _angles_cache["key"] = key
+    return _angles_cache["angles"]
+
+
 
 def process_positions():
     turrets = positions["turrets"]          # defining keys for the dict for turrets and globes
@@ -160,25 +255,69 @@ def process_positions():
     other_turrets = {t: c for t, c in turrets.items() if t != MY_TEAM}      # pull out the other team locations
 
 
-    # Print it all out to check if its correct
+    # Print it all out to check if its correct -- build the whole report
+    # first and write it once, instead of a syscall per print
 
-    print("\n--- YOUR TURRET (Team 3) ---")
-    print(my_turret)
+    lines = ["\n--- YOUR TURRET (Team 3) ---", str(my_turret)]
 
-    print("\n--- OTHER TEAMS ---")
+    lines.append("\n--- OTHER TEAMS ---")
     for t, c in other_turrets.items():
-        print(t, c)
+        lines.append(f"{t} {c}")
 
-    print("\n--- GLOBES ---")
+    lines.append("\n--- GLOBES ---")
     for g in globes:
-        print(g)
+        lines.append(str(g))
+
+    lines.append("================================\n")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+class MotorController:
+    """Latest-target coalescing for one axis.
+
+    HTTP handlers just swap the target under a short lock and return;
+    a daemon thread dispatches to the Stepper when the target changes,
+    so a burst of /trim clicks merges into one move instead of the
+    motor replaying every click.  Tracking the commanded target here
+    also gives /trim a number to add to -- the Stepper class itself
+    has no current_angle attribute.
+    """
+
+    SETTLE = 0.05   # seconds to let a click burst settle
+
+    def __init__(self, stepper):
+        self.stepper = stepper
+        self.target = 0.0          # last commanded angle
+        self._lock = threading.Lock()
+        self._evt = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def set_target(self, angle):
+        with self._lock:
+            self.target = float(angle)
+        self._evt.set()
+
+    def trim(self, amount):
+        with self._lock:
+            self.target += float(amount)
+        self._evt.set()
+
+    def _run(self):
+        last = None
+        while True:
+            self._evt.wait()
+            time.sleep(MotorController.SETTLE)
+            self._evt.clear()
+            with self._lock:
+                target = self.target
+            if target != last:
+                self.stepper.goAngle(target)   # non-blocking (queued)
+                last = target
 
-    print("================================\n")
 
 # motor set up function
 
 def setup_motors():
-    global s, m_az, m_el
+    global s, m_az, m_el, ctrl_az, ctrl_el
 
     GPIO.setwarnings(False)
     GPIO.setmode(GPIO.BCM)
@@ -195,49 +334,126 @@ def setup_motors():
 
     m_az.zero()
     m_el.zero()
+
+    ctrl_az = MotorController(m_az)
+    ctrl_el = MotorController(m_el)
     print("Motors initialized at 0°.")
 
 
 # web server set up stuff
 
 def recv_request(conn):
-    return conn.recv(8192).decode("utf-8", errors="ignore")
-
-def parse_request_line(req_text):   # parse header request
-    first = req_text.split("\r\n", 1)[0]
-    parts = first.split()
-    return (parts[0], parts[1]) if len(parts) >= 2 else ( "GET", "/" )
-
-def parse_post_body(req_text):      # parse body request, returns the dictionary of posted form fields
-    i = req_text.find("\r\n\r\n")
+    # Read until the header block terminates, then exactly
+    # Content-Length more body bytes.  A single recv() could return a
+    # request split across TCP segments, in which case the old code
+    # silently lost the POST body.
+    buf = b""
+    while b"\r\n\r\n" not in buf:
+        chunk = conn.recv(4096)
+        if not chunk:
+            return buf
+        buf += chunk
+        if len(buf) > 8192 + MAX_BODY:   # bound hostile header spam
+            return b""
+    head_end = buf.find(b"\r\n\r\n") + 4
+
+    # pull Content-Length out of the headers (case-insensitive)
+    j = buf[:head_end].lower().find(b"content-length:")
+    if j >= 0:
+        try:
+            length = int(buf[j + 15:buf.find(b"\r\n", j)])
+        except ValueError:
+            length = 0
+        length = min(length, MAX_BODY)
+        while len(buf) - head_end < length:   # read the rest of the body
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            buf += chunk
+    return buf   # raw bytes; only the body ever gets decoded
+
+# headers stay bytes end to end: one compiled match pulls method and
+# path straight off the wire, no full-request decode
+_REQ_RE = re.compile(rb"^(GET|POST) (\S+)")
+
+def parse_request_line(req):   # parse header request
+    m = _REQ_RE.match(req)
+    return (m.group(1), m.group(2)) if m else (b"GET", b"/")
+
+MAX_BODY = 4096   # our forms are ~30 bytes; refuse anything absurd
+
+def parse_post_body(req):      # parse body request, returns the dictionary of posted form fields
+    i = req.find(b"\r\n\r\n")
     if i < 0: return {}
-    body = req_text[i+4:]
-    out = {}
-    for pair in body.split("&"):
-        if "=" in pair:
-            k, v = pair.split("=", 1)
-            out[k] = v
-    return out
-
-def send_html(conn, html):  # send header as HTML
+    body = req[i+4:]
+    if not body:
+        return {}
+    if len(body) > MAX_BODY:        # bound the work on hostile input
+        return {}
+    body = body.decode("utf-8", errors="ignore")
+    # fast path: a single pair with nothing escaped (most bodies here
+    # are axis=az sized) is one partition, no generic parser
+    if "&" not in body and "%" not in body and "+" not in body:
+        k, _, v = body.partition("=")
+        return {k: v} if k else {}
+    # parse_qsl percent-decodes values (e.g. an encoded + in a trim
+    # amount), which the old split("&")/split("=") silently didn't
+    return dict(urllib.parse.parse_qsl(body, keep_blank_values=True))
+
+def send_html(conn, html_bytes):  # send pre-encoded HTML bytes
     conn.sendall((
         "HTTP/1.1 200 OK\r\n"
         "Content-Type: text/html\r\n"
-        "Connection: close\r\n\r\n"
-    ).encode() + html.encode())
-
-def send_json(conn, obj):   # # send header as json
-    conn.sendall((
-        "HTTP/1.1 200 OK\r\n"
-        "Content-Type: application/json\r\n"
-        "Connection: close\r\n\r\n"
-    ).encode() + obj.encode())
+        f"Content-Length: {len(html_bytes)}\r\n"
+        "Connection: keep-alive\r\n"
+        "Keep-Alive: timeout=5, max=1000\r\n\r\n"
+    ).encode() + html_bytes)
+
+# /coords is machine-read by the page JS, so it is serialized once per
+# positions load (compact separators, no indent) into a complete
+# response with its Content-Length already counted.
+COORDS_RESP = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\nConnection: keep-alive\r\nKeep-Alive: timeout=5, max=1000\r\n\r\n{}"
+
+
+def rebuild_coords_cache():
+    global COORDS_RESP
+    body = json.dumps(positions, separators=(",", ":")).encode()
+    COORDS_RESP = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: keep-alive\r\n"
+        b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+    ) + body
+
+
+def _json_resp(body_str):
+    # build a complete JSON response once at import; the status replies
+    # never change, so handlers sendall prebuilt bytes with zero
+    # per-request encoding or concatenation
+    body = body_str.encode()
+    return (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: keep-alive\r\n"
+        b"Keep-Alive: timeout=5, max=1000\r\n\r\n"
+    ) + body
+
+OK_RESP      = _json_resp('{"status":"ok"}')
+UNKNOWN_RESP = _json_resp('{"status":"unknown"}')
+ZEROED_RESP  = _json_resp('{"status":"zeroed"}')
+AIMED_RESP   = _json_resp('{"status":"aimed"}')
+TRIMMED_RESP = _json_resp('{"status":"trimmed"}')
+SAVED_RESP   = _json_resp('{"status":"saved"}')
 
 
 # html stuff
 
-def page_html():
-    return f"""<!doctype html>
+# Plain string, not an f-string: nothing in the page is interpolated at
+# runtime, so the old per-GET rebuild (plus doubled {{ }} all over the
+# JS) bought nothing.  Encoded once at import; GETs send the bytes.
+PAGE_HTML = """<!doctype html>
 <html>
 <head><meta charset="utf-8"><title>ENME441 Turret Control</title></head>
 <body>
@@ -272,7 +488,7 @@ def page_html():
   <button onclick="saveCalibration()">Save as New Calibration</button>
 
 <script>
-async function loadTargetIDs() {{
+async function loadTargetIDs() {
   let type = document.getElementById("target_type").value;
   let response = await fetch('/coords');
   let data = await response.json();
@@ -283,51 +499,53 @@ async function loadTargetIDs() {{
   let items = (type === "turrets") ? Object.keys(data.turrets)
                                    : data.globes.map((x,i)=>i);
 
-  items.forEach(id => {{
+  items.forEach(id => {
     let opt = document.createElement("option");
     opt.value = id;
     opt.text = id;
     sel.add(opt);
-  }});
-}}
+  });
+}
 
 document.getElementById("target_type").onchange = loadTargetIDs;
 window.onload = loadTargetIDs;
 
-async function aimTarget() {{
+async function aimTarget() {
   let type = document.getElementById("target_type").value;
   let id   = document.getElementById("target_id").value;
 
-  await fetch("/aim", {{
+  await fetch("/aim", {
     method: "POST",
-    headers: {{ "Content-Type": "application/x-www-form-urlencoded" }},
+    headers: { "Content-Type": "application/x-www-form-urlencoded" },
     body: "type="+type+"&id="+id
-  }});
-}}
+  });
+}
 
-async function trim(axis, amount) {{
-  await fetch("/trim", {{
+async function trim(axis, amount) {
+  await fetch("/trim", {
     method:"POST",
-    headers:{{"Content-Type":"application/x-www-form-urlencoded"}},
+    headers:{"Content-Type":"application/x-www-form-urlencoded"},
     body:"axis="+axis+"&amount="+amount
-  }});
-}}
+  });
+}
 
-async function saveCalibration() {{
+async function saveCalibration() {
   let type = document.getElementById("target_type").value;
   let id   = document.getElementById("target_id").value;
 
-  await fetch("/save_cal", {{
+  await fetch("/save_cal", {
     method:"POST",
-    headers:{{"Content-Type":"application/x-www-form-urlencoded"}},
+    headers:{"Content-Type":"application/x-www-form-urlencoded"},
     body:"type="+type+"&id="+id
-  }});
-}}
+  });
+}
 </script>
 
 </body>
 </html>"""
 
+PAGE_HTML_BYTES = PAGE_HTML.encode("utf-8")
+
 
 # web interface response
 
@@ -336,12 +554,15 @@ def handle_post_set(req_text):      # read response from web interface, makes su
     axis = data.get("axis", "")
     angle = float(data.get("angle", "0"))
 
-    if axis == "az":  m_az.goAngle(angle)
-    if axis == "el":  m_el.goAngle(angle)
+    if axis == "az":  ctrl_az.set_target(angle)
+    if axis == "el":  ctrl_el.set_target(angle)
 
 def handle_post_zero():         # zeros motors
     m_az.zero()
     m_el.zero()
+    # re-sync the controllers (goAngle(0) after zero is a no-op move)
+    ctrl_az.set_target(0.0)
+    ctrl_el.set_target(0.0)
 
 
 # web server set up
@@ -356,81 +577,95 @@ def run_server():
 
     while True:
         conn, addr = sock.accept()  # return socket and client address when someone connects
-        req = recv_request(conn)
-        method, path = parse_request_line(req)  # find if its a GET or POST request
-
-        if method == "GET":        # get position data
-            if path == "/coords":
-                send_json(conn, json.dumps(positions, indent=2))
-            else:
-                send_html(conn, page_html())
-
-        elif method == "POST":     
-            if path == "/set":
-                handle_post_set(req)
-                send_json(conn, '{"status":"ok"}')
-
-            elif path == "/zero":
-                handle_post_zero()
-                send_json(conn, '{"status":"zeroed"}')
-
-            # ---------------------------------------
-            # NEW: Aim at target (turret or globe)
-            # ---------------------------------------
-            elif path == "/aim":
-                data = parse_post_body(req)
-                target_type = data["type"]      # "turrets" or "globes"
-                target_id   = data["id"]        # turret number OR globe index
-
-                aim_data = load_aim_file()["angles"]
-                angles = aim_data[target_type][str(target_id)] if target_type == "turrets" else \
-                         aim_data[target_type][int(target_id)]
-
-                m_az.goAngle(angles["az"])
-                m_el.goAngle(angles["el"])
-
-                send_json(conn, '{"status":"aimed"}')
-
-            # ---------------------------------------
-            # NEW: 1° Trim buttons
-            # ---------------------------------------
-            elif path == "/trim":
-                data = parse_post_body(req)
-                axis = data["axis"]             # "az" or "el"
-                amount = float(data["amount"])  # +1 or -1
-
-                if axis == "az":
-                    new_angle = m_az.current_angle + amount
-                    m_az.goAngle(new_angle)
-                    m_az.current_angle = new_angle
-
-                elif axis == "el":
-                    new_angle = m_el.current_angle + amount
-                    m_el.goAngle(new_angle)
-                    m_el.current_angle = new_angle
-
-                send_json(conn, '{"status":"trimmed"}')
-
-            # ---------------------------------------
-            # NEW: Save Calibration
-            # ---------------------------------------
-            elif path == "/save_cal":
-                data = parse_post_body(req)
-                t = data["type"]   # "turrets" or "globes"
-                i = data["id"]     # id number or index
-
-                aim = load_aim_file()
-                stored = aim["angles"][t][i] if t == "turrets" else aim["angles"][t][int(i)]
-
-                # Save final trimmed angles as calibration offsets
-                aim["calibration"][f"{t[:-1]}_{i}_az"] = stored["az"]
-                aim["calibration"][f"{t[:-1]}_{i}_el"] = stored["el"]
-
-                save_aim_file(aim)
-
-                send_json(conn, '{"status":"saved"}')
-
-        conn.close()
+        conn.settimeout(KEEPALIVE_TIMEOUT)
+        try:
+            # keep-alive: keep answering requests on this socket until
+            # the client goes quiet or hangs up
+            while True:
+                try:
+                    req = recv_request(conn)
+                except socket.timeout:
+                    break
+                if not req:
+                    break
+                method, path = parse_request_line(req)  # find if its a GET or POST request
+
+                if method == b"GET":        # get position data
+                    if path == b"/coords":
+                        conn.sendall(COORDS_RESP)   # cached bytes
+                    else:
+                        send_html(conn, PAGE_HTML_BYTES)
+
+                elif method == b"POST":
+                    if path == b"/set":
+                        handle_post_set(req)
+                        conn.sendall(OK_RESP)
+
+                    elif path == b"/zero":
+                        handle_post_zero()
+                        conn.sendall(ZEROED_RESP)
+
+                    # ---------------------------------------
+                    # NEW: Aim at target (turret or globe)
+                    # ---------------------------------------
+                    elif path == b"/aim":
+                        data = parse_post_body(req)
+                        target_type = data["type"]      # "turrets" or "globes"
+                        target_id   = data["id"]        # turret number OR globe index
+
+                        aim_data = get_angles()   # cached unless inputs changed
+                        angles = aim_data[target_type][str(target_id)] if target_type == "turrets" else \
+                                 aim_data[target_type][int(target_id)]
+
+                        ctrl_az.set_target(angles["az"])
+                        ctrl_el.set_target(angles["el"])
+
+                        conn.sendall(AIMED_RESP)
+
+                    # ---------------------------------------
+                    # NEW: 1° Trim buttons
+                    # ---------------------------------------
+                    elif path == b"/trim":
+                        data = parse_post_body(req)
+                        axis = data["axis"]             # "az" or "el"
+                        amount = float(data["amount"])  # +1 or -1
+
+                        if axis == "az":
+                            ctrl_az.trim(amount)
+                        elif axis == "el":
+                            ctrl_el.trim(amount)
+
+                        conn.sendall(TRIMMED_RESP)
+
+                    # ---------------------------------------
+                    # NEW: Save Calibration
+                    # ---------------------------------------
+                    elif path == b"/save_cal":
+                        data = parse_post_body(req)
+                        t = data["type"]   # "turrets" or "globes"
+                        i = data["id"]     # id number or index
+
+                        aim = load_aim_file()
+                        stored = aim["angles"][t][i] if t == "turrets" else aim["angles"][t][int(i)]
+
+                        # Save final trimmed angles as calibration offsets
+                        aim["calibration"][(t[:-1], i, "az")] = stored["az"]
+                        aim["calibration"][(t[:-1], i, "el")] = stored["el"]
+
+                        save_aim_file(aim)
+                        flush_aim_file()    # calibration is worth persisting now
+
+                        conn.sendall(SAVED_RESP)
+
+                    else:
+                        # always answer: a silent unmatched POST leaves
+                        # the client hanging until its timeout
+                        conn.sendall(UNKNOWN_RESP)
+        except OSError as e:
+            # a reset or half-open client shouldn't kill the server
+            print(f"connection error from {addr}: {e}")
+        finally:
+            conn.close()
 
 
 
@@ -441,7 +676,8 @@ if __name__ == "__main__":
         setup_motors()
 
         positions = load_positions()
-        process_positions() 
+        rebuild_coords_cache()   # serialize /coords once per load
+        process_positions()
 
         run_server()
 